@@ -0,0 +1,312 @@
+"""Import historis (SD-card / arsip) CSV & JSON ke tabel sensor_data.
+
+Pemakaian:
+    python -m app.backfill logs/*.csv logs/dump.ndjson --workers 4 --chunk-size 5000
+
+File dipecah per chunk, di-parse paralel di process pool, lalu di-insert
+berurutan memakai multi-row INSERT (executemany). Progress disimpan di file
+checkpoint sehingga import yang terputus bisa dilanjutkan.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timezone
+from itertools import islice
+from typing import Iterator, Optional
+
+from sqlalchemy import insert
+
+from .coverage import mark_coverage
+from .db import engine, init_db
+from .enrichment import enrich
+from .models import SensorData
+from .schemas import to_aware
+
+# Kolom yang diisi dari arsip (urutan = urutan kolom INSERT)
+VALUE_COLUMNS = (
+    "co", "pm25", "pm10", "tvoc", "o3", "so2", "no", "no2",
+    "rh", "temp", "windSpeed", "windDir", "noise",
+    "wind_speed_kmh", "voltage", "current", "co2",
+)
+# Kolom NOT NULL (default 0.0) — executemany butuh nilai eksplisit
+NOT_NULL_DEFAULTS = {"rh": 0.0, "temp": 0.0, "windSpeed": 0.0, "windDir": 0.0, "noise": 0.0}
+TS_KEYS = ("datetime", "ts", "time", "t")
+# utf-8-sig: BOM dari Excel / logger tidak ikut menjadi bagian nama kolom pertama
+ENCODING = "utf-8-sig"
+
+
+# ==== Parsing (jalan di process pool) ====
+def _to_float(v) -> Optional[float]:
+    if v is None or v == "":
+        return None
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def _normalize(obj: dict, uid_override: Optional[str]) -> Optional[dict]:
+    uid = uid_override or obj.get("uid")
+    if not uid:
+        return None
+    ts_raw = None
+    for k in TS_KEYS:
+        if obj.get(k) not in (None, ""):
+            ts_raw = obj[k]
+            break
+    if ts_raw is None:
+        return None
+    if isinstance(ts_raw, str) and ts_raw.replace(".", "", 1).isdigit():
+        ts_raw = float(ts_raw)
+
+    row = {"uid": str(uid)[:64], "ts": to_aware(ts_raw).astimezone(timezone.utc).replace(tzinfo=None)}
+    for col in VALUE_COLUMNS:
+        row[col] = _to_float(obj.get(col))
+    wind_txt = obj.get("wind_txt")
+    row["wind_txt"] = str(wind_txt)[:32] if wind_txt not in (None, "") else None
+    return row
+
+
+def parse_chunk(kind: str, header: Optional[list[str]], lines: list, uid_override: Optional[str]) -> tuple[list[dict], int]:
+    """Parse satu chunk → (rows siap insert, jumlah baris ditolak)."""
+    rows: list[dict] = []
+    rejected = 0
+
+    if kind == "csv":
+        # items = record hasil csv.reader (field multi-baris sudah utuh)
+        objs = (dict(zip(header, rec)) for rec in lines if rec)
+    elif kind == "ndjson":
+        objs = (ln for ln in lines if ln.strip())
+    else:  # json array: elemen sudah berupa dict
+        objs = lines
+
+    for obj in objs:
+        try:
+            if isinstance(obj, str):
+                obj = json.loads(obj)
+            if not isinstance(obj, dict):
+                rejected += 1
+                continue
+            row = _normalize(obj, uid_override)
+        except Exception:
+            row = None
+        if row is None:
+            rejected += 1
+            continue
+        rows.append(row)
+
+    # Field turunan sama dengan jalur MQTT / ingest, lalu isi default NOT NULL
+    enrich(rows)
+    for row in rows:
+        for col, default in NOT_NULL_DEFAULTS.items():
+            if row[col] is None:
+                row[col] = default
+    return rows, rejected
+
+
+# ==== Chunking ====
+def _detect_kind(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".ndjson", ".jsonl"):
+        return "ndjson"
+    if ext == ".json":
+        with open(path, "r", encoding=ENCODING) as f:
+            head = f.read(1024).lstrip()
+        return "json" if head.startswith("[") else "ndjson"
+    raise ValueError(f"Unsupported file type: {path}")
+
+
+def iter_json_array(f, read_size: int = 1 << 20) -> Iterator:
+    """Stream elemen JSON array satu per satu tanpa memuat seluruh file."""
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof
+        data = f.read(read_size)
+        if not data:
+            eof = True
+            return False
+        buf, pos = buf[pos:] + data, 0
+        return True
+
+    def skip_ws():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf) or not fill():
+                return
+
+    skip_ws()
+    if pos >= len(buf) or buf[pos] != "[":
+        raise ValueError("JSON root must be an array")
+    pos += 1
+    while True:
+        skip_ws()
+        if pos >= len(buf):
+            raise ValueError("Unexpected end of JSON array")
+        if buf[pos] == "]":
+            return
+        if buf[pos] == ",":
+            pos += 1
+            continue
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+            # angka di ujung buffer bisa saja terpotong → baca lagi dulu
+            if end == len(buf) and not eof:
+                raise ValueError("need more data")
+        except ValueError:
+            if not fill():
+                raise
+            continue
+        pos = end
+        yield item
+
+
+def iter_chunks(path: str, kind: str, chunk_size: int, offset: int) -> Iterator[tuple[Optional[list[str]], list, int]]:
+    """Yield (header, items, jumlah item) mulai dari `offset` item data.
+
+    Item = elemen array (json), baris (ndjson) atau record csv.reader (csv),
+    sehingga offset checkpoint tidak bergantung pada jumlah baris fisik.
+    """
+    with open(path, "r", encoding=ENCODING, newline="") as f:
+        header = None
+        if kind == "json":
+            items = iter_json_array(f)
+        elif kind == "csv":
+            items = csv.reader(f)
+            header = next(items, None)
+            if not header:
+                return
+            header = [h.strip() for h in header]
+        else:
+            items = f
+        for _ in islice(items, offset):
+            pass
+        while True:
+            batch = list(islice(items, chunk_size))
+            if not batch:
+                return
+            yield header, batch, len(batch)
+
+
+# ==== Checkpoint ====
+class Checkpoint:
+    def __init__(self, path: str):
+        self.path = path
+        self.state: dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+
+    def get(self, file: str) -> dict:
+        return self.state.get(os.path.abspath(file), {"offset": 0, "rows": 0, "done": False})
+
+    def save(self, file: str, offset: int, rows: int, done: bool = False):
+        self.state[os.path.abspath(file)] = {"offset": offset, "rows": rows, "done": done}
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+# ==== Import ====
+async def _insert_chunk(rows: list[dict], batch_size: int):
+    """Satu chunk = satu transaksi, supaya checkpoint tidak pernah tertinggal dari data."""
+    if not rows:
+        return
+    async with engine.begin() as conn:
+        for i in range(0, len(rows), batch_size):
+            await conn.execute(insert(SensorData.__table__), rows[i:i + batch_size])
+        await mark_coverage(conn, rows)
+
+
+async def import_file(path: str, pool: ProcessPoolExecutor, ckpt: Checkpoint, args) -> int:
+    state = ckpt.get(path)
+    if state["done"]:
+        print(f"[BACKFILL] {path}: already imported ({state['rows']} rows), skip")
+        return 0
+
+    kind = _detect_kind(path)
+    offset, stored = state["offset"], state["rows"]
+    if offset:
+        print(f"[BACKFILL] {path}: resume from item {offset}")
+
+    loop = asyncio.get_running_loop()
+    pending: deque = deque()
+    chunks = iter_chunks(path, kind, args.chunk_size, offset)
+    inserted = rejected = 0
+    started = time.perf_counter()
+
+    def submit_next() -> bool:
+        nxt = next(chunks, None)
+        if nxt is None:
+            return False
+        header, items, n = nxt
+        fut = loop.run_in_executor(pool, parse_chunk, kind, header, items, args.uid)
+        pending.append((fut, n))
+        return True
+
+    # Jaga antrian parse tetap penuh tapi terbatas (memori tidak tumbuh)
+    while len(pending) < args.workers * 2 and submit_next():
+        pass
+
+    while pending:
+        fut, n = pending.popleft()
+        rows, bad = await fut
+        submit_next()
+
+        await _insert_chunk(rows, args.batch_size)
+
+        offset += n
+        stored += len(rows)
+        inserted += len(rows)
+        rejected += bad
+        ckpt.save(path, offset, stored)
+
+        elapsed = time.perf_counter() - started
+        print(f"[BACKFILL] {path}: {offset} items, {inserted} rows "
+              f"({inserted / elapsed if elapsed else 0:,.0f} rows/s), rejected {rejected}")
+
+    ckpt.save(path, offset, stored, done=True)
+    return inserted
+
+
+async def run(args):
+    await init_db()
+    ckpt = Checkpoint(args.checkpoint)
+    total = 0
+    started = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            for path in args.files:
+                total += await import_file(path, pool, ckpt, args)
+    finally:
+        await engine.dispose()
+    elapsed = time.perf_counter() - started
+    print(f"[BACKFILL] done: {total} rows in {elapsed:.1f}s "
+          f"({total / elapsed if elapsed else 0:,.0f} rows/s)")
+
+
+def main(argv: list[str] | None = None):
+    p = argparse.ArgumentParser(prog="python -m app.backfill", description="Import CSV/JSON archives into sensor_data")
+    p.add_argument("files", nargs="+", help="CSV, JSON array or NDJSON files")
+    p.add_argument("--uid", default=None, help="override uid for every row (e.g. SD-card logs without uid)")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="parser processes")
+    p.add_argument("--chunk-size", type=int, default=5000, help="items per parse chunk")
+    p.add_argument("--batch-size", type=int, default=1000, help="rows per multi-row INSERT")
+    p.add_argument("--checkpoint", default=".backfill_checkpoint.json", help="checkpoint file for resume")
+    args = p.parse_args(argv)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -22,6 +22,30 @@ class Settings(BaseSettings):
     APP_DEBUG: bool = True
     CORS_ALLOW_ORIGINS: list[str] = ["*"]
 
+    # MONITOR: station ditandai "lagging" jika lag device→commit melebihi ini
+    LAG_ALERT_SECONDS: float = 300.0
+    LAG_WINDOW_SECONDS: float = 300.0  # histogram lag = window ini + window sebelumnya
+
+    # Resolusi bitmap coverage (detik per bit) — harus membagi 10800 (1 hari = byte penuh)
+    COVERAGE_SLOT_SECONDS: int = 5
+
+    # Micro-cache hasil GET yang di-coalesce (detik); 0 = hanya single-flight
+    SINGLEFLIGHT_CACHE_TTL: float = 0.0
+
+    # HOT STORE: ring buffer in-memory per uid untuk query jam-jam terakhir.
+    # Per proses: hanya aktifkan untuk satu worker uvicorn (lihat app/hotstore.py)
+    HOTSTORE_ENABLED: bool = False
+    HOTSTORE_HOURS: float = 6.0
+    HOTSTORE_CAPACITY: int = 5000  # row per station (≈6 jam @ 5 detik)
+
+    # ENRICHMENT (per uid, "*" = default untuk semua uid) — lihat app/enrichment.py
+    # Bisa di-override via env JSON: ENRICHMENT_RULES='{"*": {...}, "<uid>": {...}}'
+    ENRICHMENT_RULES: dict[str, dict] = {
+        "*": {"co2": {"policy": "pseudo", "range": [420.0, 820.0]}},
+        "aqmsFOEmmEPISI01": {"co2": {"policy": "daynight", "day": [50.0, 100.0], "night": [300.0, 400.0]}},
+        "aqmsFOEmmEPISI02": {"co2": {"policy": "daynight", "day": [300.0, 400.0], "night": [500.0, 600.0]}},
+    }
+
     class Config:
         env_file = ".env"
         extra = "ignore"
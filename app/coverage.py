@@ -0,0 +1,173 @@
+"""Bitmap coverage per uid per hari untuk /data/coverage.
+
+Setiap (uid, hari UTC) punya satu row di ``sensor_coverage`` berisi bitmap
+``SLOTS_PER_DAY`` bit: bit k = ada minimal satu sampel di slot
+[k * COVERAGE_SLOT_SECONDS, (k + 1) * COVERAGE_SLOT_SECONDS) hari itu.
+Bit slot k ada di byte k // 8, bit k % 8 (little-endian), jadi satu hari bisa
+dibaca langsung dengan ``int.from_bytes(bits, "little")``.
+
+Bitmap diisi di transaksi yang sama dengan insert ``sensor_data`` (MQTTWorker,
+POST /data/ingest, backfill) lewat ``mark_coverage()``: upsert dengan
+``bits = bits | VALUES(bits)``, jadi urutan dan duplikat tidak berpengaruh.
+Data yang sudah ada sebelum tabel ini dibuat diisi ulang dengan:
+
+    python -m app.coverage --since 2025-01-01 [--until 2025-02-01]
+
+Query coverage sebulan untuk semua station cukup membaca stations x hari blob
+(~2 KB untuk slot 5 detik) lalu menghitung popcount dan run bit nol di Python.
+"""
+import argparse
+import asyncio
+import math
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable
+
+from sqlalchemy import text
+
+from .config import settings
+
+SLOT_SECONDS = settings.COVERAGE_SLOT_SECONDS
+if SLOT_SECONDS <= 0 or 86400 % (8 * SLOT_SECONDS):
+    raise ValueError("COVERAGE_SLOT_SECONDS must divide 10800 (one day = whole bytes)")
+SLOTS_PER_DAY = 86400 // SLOT_SECONDS
+DAY_BYTES = SLOTS_PER_DAY // 8
+
+_NONZERO = re.compile(rb"[^\x00]")
+
+UPSERT_SQL = text("""
+    INSERT INTO sensor_coverage (uid, day, bits) VALUES (:uid, :day, :bits)
+    ON DUPLICATE KEY UPDATE bits = bits | VALUES(bits)
+""")
+
+
+def _slot(ts: datetime) -> tuple[date, int]:
+    """(hari UTC, slot) untuk ts, dibulatkan ke detik penuh seperti kolom DATETIME."""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    sec = math.floor(ts.timestamp() + 0.5)
+    day, rem = divmod(sec, 86400)
+    return date(1970, 1, 1) + timedelta(days=day), rem // SLOT_SECONDS
+
+
+# ==== Tulis ====
+def build_masks(rows: Iterable[dict]) -> dict[tuple[str, date], bytearray]:
+    masks: dict[tuple[str, date], bytearray] = {}
+    for r in rows:
+        day, k = _slot(r["ts"])
+        key = (r["uid"], day)
+        mask = masks.get(key)
+        if mask is None:
+            mask = masks[key] = bytearray(DAY_BYTES)
+        mask[k >> 3] |= 1 << (k & 7)
+    return masks
+
+
+async def mark_coverage(conn, rows: Iterable[dict]):
+    """Upsert bitmap untuk batch row (dict dengan uid & ts); panggil sebelum commit."""
+    masks = build_masks(rows)
+    if masks:
+        await conn.execute(UPSERT_SQL, [
+            {"uid": uid, "day": day, "bits": bytes(mask)} for (uid, day), mask in sorted(masks.items())
+        ])
+
+
+# ==== Baca ====
+async def load(db, day_from: date, day_to: date, uid: str | None = None) -> dict[str, dict[date, bytes]]:
+    """Bitmap per uid per hari untuk day_from..day_to (inklusif)."""
+    params = {"d0": day_from, "d1": day_to}
+    where = "day >= :d0 AND day <= :d1"
+    if uid:
+        where = "uid = :uid AND " + where
+        params["uid"] = uid
+    out: dict[str, dict[date, bytes]] = {}
+    rows = await db.execute(text(f"SELECT uid, day, bits FROM sensor_coverage WHERE {where}"), params)
+    for r in rows:
+        out.setdefault(r.uid, {})[r.day] = bytes(r.bits)
+    return out
+
+
+def timeline(days: dict[date, bytes], day0: date, n_days: int) -> bytes:
+    """Gabungkan bitmap harian menjadi satu bitmap mulai day0 (hari tanpa row = nol)."""
+    empty = bytes(DAY_BYTES)
+    return b"".join(days.get(day0 + timedelta(days=i), empty) for i in range(n_days))
+
+
+def count_slots(tl: bytes, lo: int, hi: int) -> int:
+    """Jumlah slot terisi di [lo, hi)."""
+    if hi <= lo:
+        return 0
+    v = int.from_bytes(tl[lo >> 3:(hi + 7) >> 3], "little") >> (lo & 7)
+    return (v & ((1 << (hi - lo)) - 1)).bit_count()
+
+
+def gap_runs(tl: bytes, lo: int, hi: int, min_slots: int) -> list[tuple[int, int]]:
+    """Run slot kosong [a, b) di dalam [lo, hi) dengan panjang >= min_slots."""
+    if hi <= lo:
+        return []
+    # run >= min_slots bit pasti memuat byte nol penuh sebanyak ini → cek cepat di level C
+    zero_bytes = -(-(min_slots - 14) // 8)
+    if zero_bytes > 0 and bytes(zero_bytes) not in tl[lo >> 3:(hi + 7) >> 3]:
+        return []
+    mask = ((1 << hi) - 1) ^ ((1 << lo) - 1)
+    empty = ~int.from_bytes(tl, "little") & mask
+    # full[p] = 1 ⇔ empty[p .. p + min_slots - 1] semua 1 (log-doubling, O(log n) operasi)
+    full, width = empty, 1
+    while width < min_slots:
+        step = min(width, min_slots - width)
+        full &= full >> step
+        width += step
+    starts = full & ~(empty << 1)                  # awal run yang cukup panjang
+    ends = (full << (min_slots - 1)) & ~(empty >> 1)  # slot terakhir run yang sama
+    return list(zip(_set_bits(starts), (e + 1 for e in _set_bits(ends))))
+
+
+def _set_bits(v: int) -> list[int]:
+    """Posisi bit 1 di v (naik); byte nol dilewati oleh regex di level C."""
+    raw = v.to_bytes((v.bit_length() + 7) // 8, "little")
+    out = []
+    for m in _NONZERO.finditer(raw):
+        i, byte = m.start(), raw[m.start()]
+        out.extend(8 * i + k for k in range(8) if byte >> k & 1)
+    return out
+
+
+# ==== Rebuild dari sensor_data ====
+REBUILD_SQL = text("""
+    SELECT uid, TIMESTAMPDIFF(SECOND, :day, ts) DIV :slot AS k
+    FROM sensor_data
+    WHERE ts >= :day AND ts < :next
+    GROUP BY uid, k
+""")
+
+
+async def rebuild(day_from: date, day_to: date):
+    from .db import engine, init_db
+    await init_db()
+    day = day_from
+    while day < day_to:
+        start = datetime(day.year, day.month, day.day)
+        async with engine.begin() as conn:
+            result = await conn.execute(REBUILD_SQL, {"day": start, "next": start + timedelta(days=1), "slot": SLOT_SECONDS})
+            masks: dict[str, bytearray] = {}
+            for uid, k in result:
+                mask = masks.setdefault(uid, bytearray(DAY_BYTES))
+                mask[k >> 3] |= 1 << (k & 7)
+            if masks:
+                await conn.execute(UPSERT_SQL, [{"uid": uid, "day": day, "bits": bytes(m)} for uid, m in masks.items()])
+        print(f"[COVERAGE] {day.isoformat()}: {len(masks)} station(s)")
+        day += timedelta(days=1)
+    await engine.dispose()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Isi ulang sensor_coverage dari sensor_data")
+    ap.add_argument("--since", required=True, type=date.fromisoformat, help="hari UTC pertama (YYYY-MM-DD)")
+    ap.add_argument("--until", type=date.fromisoformat, help="hari UTC terakhir, eksklusif (default: besok)")
+    args = ap.parse_args(argv)
+    until = args.until or datetime.now(timezone.utc).date() + timedelta(days=1)
+    asyncio.run(rebuild(args.since, until))
+
+
+if __name__ == "__main__":
+    main()
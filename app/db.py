@@ -22,6 +22,6 @@ async def get_db() -> AsyncSession:
 async def init_db():
     """Create tables & set server timezone to UTC."""
     async with engine.begin() as conn:
-        from .models import SensorData, MaintenanceHistory  # ensure models are imported
+        from .models import SensorData, SensorCoverage, MaintenanceHistory  # ensure models are imported
         await conn.run_sync(Base.metadata.create_all)
         await conn.execute(text("SET time_zone = '+00:00';"))
@@ -0,0 +1,179 @@
+"""Enrichment per station: field turunan yang dihitung sama di semua jalur ingest.
+
+Rules diambil dari ``settings.ENRICHMENT_RULES`` (key ``"*"`` = default, lalu
+di-merge dengan key uid). Setiap uid di-compile sekali menjadi daftar step;
+setiap step memproses satu batch row (dict hasil ``SensorPoint.to_row()``)
+sekaligus. Urutan step: scale (konversi unit) → offset (kalibrasi) → wind → co2.
+
+Contoh rule:
+    {
+        "scale": {"co": 1000.0},            # mis. ppm → ppb
+        "offset": {"pm25": -1.5},           # kalibrasi
+        "wind": true,                       # windSpeed <-> wind_speed_kmh, windDir -> wind_txt
+        "co2": {"policy": "daynight", "day": [50, 100], "night": [300, 400]}
+    }
+
+Policy co2 (hanya mengisi jika co2 kosong): ``none``, ``pseudo`` (deterministik
+per uid+ts di ``range``), ``daynight`` (pseudo dengan range siang 06–18 / malam,
+jam Asia/Jakarta), ``random`` (acak di ``range``).
+"""
+import random
+import zlib
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Callable, Iterable
+from zoneinfo import ZoneInfo
+
+from .config import settings
+
+JAKARTA = ZoneInfo("Asia/Jakarta")
+# Asia/Jakarta tidak memakai DST → offset tetap, cukup dihitung sekali
+_JAKARTA_OFFSET = int(datetime.now(JAKARTA).utcoffset().total_seconds())
+
+COMPASS_16 = (
+    "N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE",
+    "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW",
+)
+MS_TO_KMH = 3.6
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+
+Step = Callable[[list[dict]], None]
+
+
+def _epoch(ts: datetime) -> float:
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+def _merge_rules(uid: str) -> dict:
+    rules = settings.ENRICHMENT_RULES
+    merged = {k: (dict(v) if isinstance(v, dict) else v) for k, v in rules.get("*", {}).items()}
+    for k, v in rules.get(uid, {}).items():
+        if isinstance(v, dict) and k in ("scale", "offset"):
+            merged[k] = {**merged.get(k, {}), **v}
+        else:
+            merged[k] = v
+    return merged
+
+
+# ==== Steps ====
+def _scale_step(factors: dict[str, float]) -> Step:
+    items = tuple(factors.items())
+
+    def run(rows: list[dict]):
+        for col, f in items:
+            for r in rows:
+                v = r.get(col)
+                if v is not None:
+                    r[col] = v * f
+    return run
+
+
+def _offset_step(offsets: dict[str, float]) -> Step:
+    items = tuple(offsets.items())
+
+    def run(rows: list[dict]):
+        for col, d in items:
+            for r in rows:
+                v = r.get(col)
+                if v is not None:
+                    r[col] = v + d
+    return run
+
+
+def _wind_step(rows: list[dict]):
+    for r in rows:
+        ms, kmh = r.get("windSpeed"), r.get("wind_speed_kmh")
+        if kmh is None and ms is not None:
+            r["wind_speed_kmh"] = round(ms * MS_TO_KMH, 2)
+        elif ms is None and kmh is not None:
+            r["windSpeed"] = round(kmh / MS_TO_KMH, 2)
+
+        deg = r.get("windDir")
+        if r.get("wind_txt") is None and deg is not None:
+            r["wind_txt"] = COMPASS_16[int(((deg % 360.0) + 11.25) // 22.5) % 16]
+
+
+def _co2_step(uid: str, cfg: dict) -> Step | None:
+    policy = cfg.get("policy", "none")
+    if policy == "none":
+        return None
+
+    lo, hi = cfg.get("range", (420.0, 820.0))
+    if policy == "random":
+        def run_random(rows: list[dict]):
+            for r in rows:
+                if r.get("co2") is None:
+                    r["co2"] = round(random.uniform(lo, hi), 1)
+        return run_random
+
+    # hash murah & deterministik: seed uid dihitung sekali, per row cukup
+    # finalizer splitmix64 (mixing penuh → tidak ada pola gergaji untuk ts berurutan)
+    seed = zlib.crc32(uid.encode())
+
+    def frac(epoch: int) -> float:
+        z = ((epoch ^ seed) + 0x9E3779B97F4A7C15) & _MASK64
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+        return ((z ^ (z >> 31)) >> 11) / 2.0 ** 53
+
+    if policy == "pseudo":
+        def run_pseudo(rows: list[dict]):
+            for r in rows:
+                if r.get("co2") is None:
+                    r["co2"] = round(lo + frac(int(_epoch(r["ts"]))) * (hi - lo), 1)
+        return run_pseudo
+
+    if policy == "daynight":
+        day_lo, day_hi = cfg.get("day", (lo, hi))
+        night_lo, night_hi = cfg.get("night", (lo, hi))
+
+        def run_daynight(rows: list[dict]):
+            for r in rows:
+                if r.get("co2") is None:
+                    epoch = int(_epoch(r["ts"]))
+                    hour = ((epoch + _JAKARTA_OFFSET) // 3600) % 24
+                    a, b = (day_lo, day_hi) if 6 <= hour < 18 else (night_lo, night_hi)
+                    r["co2"] = round(a + frac(epoch) * (b - a), 1)
+        return run_daynight
+
+    raise ValueError(f"Unknown co2 policy for {uid}: {policy}")
+
+
+# ==== Pipeline ====
+class Pipeline:
+    def __init__(self, uid: str, steps: list[Step]):
+        self.uid = uid
+        self.steps = steps
+
+    def apply(self, rows: list[dict]):
+        for step in self.steps:
+            step(rows)
+
+
+@lru_cache(maxsize=None)
+def get_pipeline(uid: str) -> Pipeline:
+    rules = _merge_rules(uid)
+    steps: list[Step] = []
+    if rules.get("scale"):
+        steps.append(_scale_step(rules["scale"]))
+    if rules.get("offset"):
+        steps.append(_offset_step(rules["offset"]))
+    if rules.get("wind", True):
+        steps.append(_wind_step)
+    co2 = _co2_step(uid, rules.get("co2") or {})
+    if co2:
+        steps.append(co2)
+    return Pipeline(uid, steps)
+
+
+def enrich(rows: Iterable[dict]) -> list[dict]:
+    """Terapkan pipeline per uid ke batch row (in-place); row harus punya uid & ts."""
+    rows = list(rows)
+    by_uid: dict[str, list[dict]] = {}
+    for r in rows:
+        by_uid.setdefault(r["uid"], []).append(r)
+    for uid, batch in by_uid.items():
+        get_pipeline(uid).apply(batch)
+    return rows
@@ -0,0 +1,251 @@
+"""Hot store in-process: ring buffer per uid untuk data beberapa jam terakhir.
+
+Setiap uid punya buffer kapasitas tetap (``HOTSTORE_CAPACITY`` row) dengan satu
+``array`` bertipe per kolom (float64; NaN = NULL), jadi memori per station
+terbatas dan bisa dihitung. Store di-warm saat startup dari ``sensor_data``
+(``HOTSTORE_HOURS`` terakhir) lalu di-append oleh MQTTWorker dan /data/ingest.
+
+Query hanya dijawab dari store jika rentangnya dijamin lengkap:
+``date_from >= max(covered_from, evicted_upto[uid])`` — ``covered_from`` = awal
+window saat warm, ``evicted_upto`` = ts terbesar yang pernah terdorong keluar
+dari ring. Selain itu router fallback ke MySQL.
+
+Store bersifat per proses. Tulisan yang tidak lewat proses ini tidak terlihat
+sampai restart: mis. ``python -m app.backfill`` untuk jam-jam terakhir, atau
+``uvicorn --workers N`` di mana POST /data/ingest ke satu worker tidak masuk ke
+hot store worker lain. Untuk multi-worker, set ``HOTSTORE_ENABLED=false``.
+
+Jika row datang berurutan (kasus normal), row terbaru ada di ``max_slot`` dan
+query rentang memakai bisect pada urutan logis ring; data yang tidak berurutan
+jatuh ke scan linear.
+"""
+import math
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from .models import SensorData
+
+FLOAT_COLUMNS = (
+    "co", "pm25", "pm10", "tvoc", "o3", "so2", "no", "no2",
+    "temp", "rh", "wind_speed_kmh", "noise", "voltage", "current", "co2",
+)
+NAN = float("nan")
+
+
+def _epoch(ts: datetime) -> float:
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+def _db_seconds(ts: datetime) -> float:
+    """Bulatkan ke detik penuh seperti kolom DATETIME MySQL (tanpa fsp)."""
+    return float(math.floor(_epoch(ts) + 0.5))
+
+
+class _LogicalTs:
+    """View ts ring dalam urutan logis (terlama → terbaru) untuk bisect."""
+    __slots__ = ("ring",)
+
+    def __init__(self, ring: "StationRing"):
+        self.ring = ring
+
+    def __len__(self) -> int:
+        return self.ring.size
+
+    def __getitem__(self, k: int) -> float:
+        return self.ring.ts[self.ring.slot(k)]
+
+
+class StationRing:
+    """Ring buffer kolom-per-array untuk satu uid."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.head = 0  # slot berikutnya yang ditulis
+        self.size = 0
+        self.evicted_upto = -math.inf
+        self.max_ts = -math.inf
+        self.max_slot = -1
+        # panjang run append ber-ts naik terakhir; >= size → seluruh isi ring terurut
+        self._in_order = 0
+        self.ids = array("q", bytes(8 * capacity))
+        self.ts = array("d", bytes(8 * capacity))
+        self.wind = array("H", bytes(2 * capacity))  # kode ke HotStore._labels, 0 = NULL
+        self.cols = {c: array("d", bytes(8 * capacity)) for c in FLOAT_COLUMNS}
+
+    def nbytes(self) -> int:
+        arrays = [self.ids, self.ts, self.wind, *self.cols.values()]
+        return sum(a.itemsize * len(a) for a in arrays)
+
+    @property
+    def ordered(self) -> bool:
+        return self._in_order >= self.size
+
+    def slot(self, k: int) -> int:
+        """Slot fisik untuk posisi logis k (0 = row terlama)."""
+        first = self.head if self.size == self.capacity else 0
+        return (first + k) % self.capacity
+
+    def append(self, rec_id: int, ts: float, wind_code: int, values: dict):
+        i = self.head
+        if self.size == self.capacity:
+            if self.ts[i] > self.evicted_upto:
+                self.evicted_upto = self.ts[i]
+        else:
+            self.size += 1
+        prev = self.ts[(i - 1) % self.capacity] if self.size > 1 else -math.inf
+        self._in_order = self._in_order + 1 if ts >= prev else 1
+
+        self.ids[i] = rec_id
+        self.ts[i] = ts
+        self.wind[i] = wind_code
+        for c, arr in self.cols.items():
+            v = values.get(c)
+            arr[i] = NAN if v is None else v
+        self.head = (i + 1) % self.capacity
+
+        if ts >= self.max_ts:
+            self.max_ts, self.max_slot = ts, i
+        elif i == self.max_slot:
+            # slot maksimum tertimpa (hanya terjadi pada data tidak berurutan)
+            self.max_slot = max(range(self.size), key=lambda j: (self.ts[j], self.ids[j]))
+            self.max_ts = self.ts[self.max_slot]
+
+    def select(self, start: float, end: float) -> list[int]:
+        """Index slot dengan start <= ts < end, terurut naik menurut ts."""
+        if self.ordered:
+            view = _LogicalTs(self)
+            lo = bisect_left(view, start)
+            hi = bisect_left(view, end, lo)
+            return [self.slot(k) for k in range(lo, hi)]
+        ts = self.ts
+        idx = [i for i in range(self.size) if start <= ts[i] < end]
+        idx.sort(key=lambda i: (ts[i], self.ids[i]))
+        return idx
+
+
+class HotStore:
+    def __init__(self, hours: float, capacity: int):
+        self.hours = hours
+        self.capacity = capacity
+        self.ready = False
+        self.covered_from = math.inf
+        self._stations: dict[str, StationRing] = {}
+        self._labels: list[str | None] = [None]
+        self._label_codes: dict[str, int] = {}
+
+    # ==== Tulis ====
+    def _wind_code(self, txt: str | None) -> int:
+        if txt is None:
+            return 0
+        code = self._label_codes.get(txt)
+        if code is None:
+            if len(self._labels) >= 0xFFFF:
+                return 0
+            code = self._label_codes[txt] = len(self._labels)
+            self._labels.append(txt)
+        return code
+
+    def append(self, records: Iterable):
+        """Tambah record yang sudah di-commit (SensorData / Row dengan atribut kolom)."""
+        for r in records:
+            if r.id is None:
+                continue
+            ring = self._stations.get(r.uid)
+            if ring is None:
+                ring = self._stations[r.uid] = StationRing(self.capacity)
+            ring.append(
+                r.id,
+                _db_seconds(r.ts),
+                self._wind_code(r.wind_txt),
+                {c: getattr(r, c) for c in FLOAT_COLUMNS},
+            )
+
+    async def warm(self, session: AsyncSession):
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=self.hours)
+        cols = [SensorData.id, SensorData.uid, SensorData.ts, SensorData.wind_txt]
+        cols += [getattr(SensorData, c) for c in FLOAT_COLUMNS]
+        stmt = (
+            select(*cols)
+            .where(SensorData.ts >= cutoff.replace(tzinfo=None))
+            .order_by(SensorData.ts)
+        )
+        self._stations.clear()
+        self.append((await session.execute(stmt)).all())
+        self.covered_from = cutoff.timestamp()
+        self.ready = True
+        print(f"[HOT] warmed {sum(r.size for r in self._stations.values())} rows "
+              f"for {len(self._stations)} station(s) since {cutoff.isoformat()}")
+
+    # ==== Baca ====
+    def covers(self, uid: str | None, date_from: datetime | None) -> bool:
+        if not self.ready or not uid or date_from is None:
+            return False
+        start = _epoch(date_from)
+        ring = self._stations.get(uid)
+        return start >= self.covered_from and (ring is None or start > ring.evicted_upto)
+
+    def _row(self, uid: str, ring: StationRing, i: int) -> SimpleNamespace:
+        values = {}
+        for c, arr in ring.cols.items():
+            v = arr[i]
+            values[c] = None if v != v else v
+        return SimpleNamespace(
+            id=ring.ids[i],
+            uid=uid,
+            ts=datetime.fromtimestamp(ring.ts[i], tz=timezone.utc),
+            wind_txt=self._labels[ring.wind[i]],
+            **values,
+        )
+
+    def query(self, uid: str, date_from: datetime, date_to: datetime | None = None,
+              order: str = "desc", offset: int = 0, limit: int | None = None) -> tuple[int, list[SimpleNamespace]]:
+        """(total, rows) untuk rentang [date_from, date_to); panggil hanya jika covers()."""
+        ring = self._stations.get(uid)
+        if ring is None:
+            return 0, []
+        end = _epoch(date_to) if date_to else math.inf
+        idx = ring.select(_epoch(date_from), end)
+        if order.lower() != "asc":
+            idx.reverse()
+        page = idx[offset:offset + limit] if limit is not None else idx[offset:]
+        return len(idx), [self._row(uid, ring, i) for i in page]
+
+    def latest(self, uid: str) -> SimpleNamespace | None:
+        """Row terbaru uid, atau None jika store tidak bisa menjaminnya."""
+        ring = self._stations.get(uid)
+        if not self.ready or ring is None or not ring.size:
+            return None
+        if ring.max_ts < self.covered_from or ring.max_ts <= ring.evicted_upto:
+            return None
+        return self._row(uid, ring, ring.max_slot)
+
+    def stats(self) -> dict:
+        stations = [
+            {"uid": uid, "rows": ring.size, "capacity": ring.capacity, "bytes": ring.nbytes(),
+             "evicted_upto": datetime.fromtimestamp(ring.evicted_upto, tz=timezone.utc).isoformat()
+             if ring.evicted_upto > -math.inf else None}
+            for uid, ring in sorted(self._stations.items())
+        ]
+        return {
+            "enabled": settings.HOTSTORE_ENABLED,
+            "ready": self.ready,
+            "hours": self.hours,
+            "capacity_per_station": self.capacity,
+            "covered_from": datetime.fromtimestamp(self.covered_from, tz=timezone.utc).isoformat()
+            if self.ready else None,
+            "total_rows": sum(s["rows"] for s in stations),
+            "total_bytes": sum(s["bytes"] for s in stations),
+            "stations": stations,
+        }
+
+
+hot_store = HotStore(settings.HOTSTORE_HOURS, settings.HOTSTORE_CAPACITY)
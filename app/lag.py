@@ -0,0 +1,181 @@
+"""Pelacakan lag ingest end-to-end per station (in-memory).
+
+Per row dicatat tiga waktu: ``ts`` device, waktu pesan diterima dari broker,
+dan waktu commit ke DB. Dari situ dihitung:
+    transit = received - ts      (buffer di device + delay broker)
+    db      = committed - received (parse + enrichment + tulis DB)
+    total   = committed - ts
+Masing-masing disimpan sebagai histogram bucket tetap per window
+(``LAG_WINDOW_SECONDS``; window berjalan + window sebelumnya), plus tabel
+"last seen". Kuantil dan flag ``lagging`` memakai window terbaru saja, jadi
+menjawab "apakah lambat sekarang", bukan rata-rata sejak proses start.
+"""
+import time
+from bisect import bisect_left
+from datetime import datetime, timezone
+from typing import Iterable
+
+from .config import settings
+
+# Batas atas bucket (detik); bucket terakhir = overflow
+BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 21600, 86400)
+STAGES = ("transit", "db", "total")
+
+
+class LagHistogram:
+    __slots__ = ("counts", "n", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.n = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, v: float):
+        v = max(v, 0.0)
+        self.counts[bisect_left(BUCKETS, v)] += 1
+        self.n += 1
+        self.sum += v
+        if v > self.max:
+            self.max = v
+
+    def merge(self, other: "LagHistogram") -> "LagHistogram":
+        out = LagHistogram()
+        out.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        out.n = self.n + other.n
+        out.sum = self.sum + other.sum
+        out.max = max(self.max, other.max)
+        return out
+
+    def quantile(self, q: float) -> float | None:
+        """Perkiraan kuantil = batas atas bucket tempat kuantil jatuh."""
+        if not self.n:
+            return None
+        target = q * self.n
+        acc = 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= target:
+                return BUCKETS[i] if i < len(BUCKETS) else self.max
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.n,
+            "avg": round(self.sum / self.n, 3) if self.n else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": round(self.max, 3),
+            "buckets": {
+                (f"le_{b}" if i < len(BUCKETS) else "inf"): c
+                for i, (b, c) in enumerate(zip(BUCKETS + (None,), self.counts))
+            },
+        }
+
+
+class WindowedHistogram:
+    """Histogram window berjalan + window sebelumnya; window lama dibuang saat rotasi."""
+    __slots__ = ("window", "started", "current", "previous")
+
+    def __init__(self, window: float):
+        self.window = window
+        self.started = 0.0
+        self.current = LagHistogram()
+        self.previous = LagHistogram()
+
+    def _rotate(self, now: float):
+        if now < self.started + self.window:
+            return
+        # lewat lebih dari satu window tanpa data → window sebelumnya juga kosong
+        self.previous = self.current if now < self.started + 2 * self.window else LagHistogram()
+        self.current = LagHistogram()
+        self.started = now - (now % self.window)
+
+    def add(self, v: float, now: float):
+        self._rotate(now)
+        self.current.add(v)
+
+    def recent(self, now: float) -> LagHistogram:
+        self._rotate(now)
+        return self.previous.merge(self.current)
+
+
+class StationLag:
+    __slots__ = ("hist", "rows", "last_ts", "last_received", "last_committed", "last")
+
+    def __init__(self):
+        self.hist = {s: WindowedHistogram(settings.LAG_WINDOW_SECONDS) for s in STAGES}
+        self.rows = 0
+        self.last_ts: float | None = None
+        self.last_received: float | None = None
+        self.last_committed: float | None = None
+        self.last: dict[str, float] = {}
+
+
+def _iso(epoch: float | None) -> str | None:
+    if epoch is None:
+        return None
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).isoformat()
+
+
+class LagTracker:
+    def __init__(self):
+        self._stations: dict[str, StationLag] = {}
+
+    def record(self, rows: Iterable[dict], received_at: float, committed_at: float | None = None):
+        """Catat batch row (dict dengan uid & ts UTC) yang sudah di-commit."""
+        committed_at = committed_at or time.time()
+        db_lag = committed_at - received_at
+        for r in rows:
+            ts = r["ts"]
+            if ts.tzinfo is None:
+                ts = ts.replace(tzinfo=timezone.utc)
+            device = ts.timestamp()
+
+            st = self._stations.get(r["uid"])
+            if st is None:
+                st = self._stations[r["uid"]] = StationLag()
+            lags = {"transit": received_at - device, "db": db_lag, "total": committed_at - device}
+            for stage, v in lags.items():
+                st.hist[stage].add(v, committed_at)
+            st.rows += 1
+            st.last = lags
+            if st.last_ts is None or device > st.last_ts:
+                st.last_ts = device
+            st.last_received = received_at
+            st.last_committed = committed_at
+
+    def snapshot(self, uid: str | None = None, threshold: float | None = None) -> dict:
+        threshold = settings.LAG_ALERT_SECONDS if threshold is None else threshold
+        now = time.time()
+        stations = []
+        for key, st in sorted(self._stations.items()):
+            if uid and key != uid:
+                continue
+            recent = {s: h.recent(now) for s, h in st.hist.items()}
+            p95_total = recent["total"].quantile(0.95)
+            since_seen = now - st.last_received if st.last_received else None
+            stale = since_seen is not None and since_seen > threshold
+            stations.append({
+                "uid": key,
+                "last_ts": _iso(st.last_ts),
+                "last_received": _iso(st.last_received),
+                "last_committed": _iso(st.last_committed),
+                "seconds_since_seen": round(since_seen, 1) if since_seen is not None else None,
+                "last_lag": {k: round(v, 3) for k, v in st.last.items()},
+                "rows": st.rows,
+                # lagging: p95 lag window terbaru di atas threshold, atau station berhenti mengirim
+                "stale": stale,
+                "lagging": stale or (p95_total is not None and p95_total > threshold),
+                "window_seconds": settings.LAG_WINDOW_SECONDS,
+                "histograms": {s: h.to_dict() for s, h in recent.items()},
+            })
+        return {
+            "threshold_seconds": threshold,
+            "flagged": [s["uid"] for s in stations if s["lagging"]],
+            "stations": stations,
+        }
+
+
+lag_tracker = LagTracker()
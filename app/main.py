@@ -3,10 +3,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.routing import APIRoute
 
 from .config import settings
-from .db import init_db, engine
+from .db import init_db, engine, SessionLocal
+from .hotstore import hot_store
 from .mqtt_worker import MQTTWorker
 from .routers.sensors import router as sensors_router
 from .routers.maintenance import router as maintenance_router
+from .routers.monitor import router as monitor_router
 
 app = FastAPI(title="AQMS (CO/PM) MQTT → MySQL")
 
@@ -31,6 +33,11 @@ print("[CONF] TOPIC    =", settings.MQTT_TOPIC)
 @app.on_event("startup")
 async def on_startup():
     await init_db()
+    if settings.HOTSTORE_ENABLED:
+        print("[HOT] enabled — per-process store; run a single uvicorn worker and "
+              "restart after backfilling recent hours")
+        async with SessionLocal() as session:
+            await hot_store.warm(session)
     await mqtt_worker.start()
     # Debug route list
     print("[APP] Registered routes:")
@@ -46,6 +53,7 @@ async def on_shutdown():
 # Routers
 app.include_router(sensors_router)
 app.include_router(maintenance_router)
+app.include_router(monitor_router)
 
 @app.get("/health")
 async def health():
@@ -1,5 +1,5 @@
-from datetime import datetime, timezone
-from sqlalchemy import Integer, String, Float, DateTime, JSON, Index, Text
+from datetime import date, datetime, timezone
+from sqlalchemy import Integer, String, Float, DateTime, Date, JSON, Index, Text, LargeBinary
 from sqlalchemy.orm import Mapped, mapped_column
 from .db import Base
 
@@ -31,6 +31,14 @@ class SensorData(Base):
 
 Index("ix_sensor_uid_ts", SensorData.uid, SensorData.ts)
 
+class SensorCoverage(Base):
+    """Bitmap kehadiran data per uid per hari UTC (1 bit per COVERAGE_SLOT_SECONDS)."""
+    __tablename__ = "sensor_coverage"
+
+    uid: Mapped[str] = mapped_column(String(64), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True, index=True)
+    bits: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
 class MaintenanceHistory(Base):
     __tablename__ = "maintenance_history"
 
@@ -2,6 +2,7 @@ import asyncio
 import json
 import os
 import ssl
+import time
 from typing import Optional, List
 
 from asyncio_mqtt import Client, MqttError
@@ -12,13 +13,13 @@ from .config import settings
 from .db import SessionLocal
 from .models import SensorData
 from .schemas import SensorPoint
+from .enrichment import enrich
+from .coverage import mark_coverage
+from .lag import lag_tracker
+from .hotstore import hot_store
+from .readcache import sensor_reads
 
-from datetime import datetime, timezone
-from zoneinfo import ZoneInfo
-import hashlib
-import random  # boleh dihapus jika tidak ingin opsi acak sama sekali
-
-JAKARTA = ZoneInfo("Asia/Jakarta")
+from datetime import datetime
 
 class MQTTWorker:
     def __init__(self):
@@ -104,9 +105,22 @@ class MQTTWorker:
             async for message in messages:
                 if self._stopping.is_set():
                     break
-                await self._handle_message(message.topic, message.payload)
-
-    async def _handle_message(self, topic: str, payload: bytes):
+                await self._handle_message(message.topic, message.payload, self._arrival_time(message))
+
+    @staticmethod
+    def _arrival_time(message) -> float:
+        """Wall-clock saat paho menerima paket, bukan saat diambil dari antrian asyncio-mqtt.
+
+        ``MQTTMessage.timestamp`` diisi paho (time.monotonic) ketika PUBLISH masuk,
+        jadi waktu antri di belakang commit DB yang lambat tidak dihitung sebagai transit.
+        """
+        ts = getattr(message, "timestamp", 0) or 0
+        if not ts:
+            return time.time()
+        return time.time() - (time.monotonic() - ts)
+
+    async def _handle_message(self, topic: str, payload: bytes, received_at: float | None = None):
+        received_at = received_at or time.time()
         try:
             payload_text = payload.decode("utf-8", errors="replace").strip()
             if not payload_text:
@@ -137,31 +151,6 @@ class MQTTWorker:
                             break
                 return obj
 
-            # --- fungsi lokal untuk pseudo CO2 (deterministik) ---
-            def _pseudo_co2(_uid: str, _ts_utc: datetime, lo=420.0, hi=820.0) -> float:
-                if _ts_utc.tzinfo is None:
-                    _ts_utc = _ts_utc.replace(tzinfo=timezone.utc)
-                key = f"{_uid}|{int(_ts_utc.timestamp())}"
-                h = int(hashlib.md5(key.encode()).hexdigest()[:8], 16)  # 32-bit
-                frac = h / 0xFFFFFFFF
-                return round(lo + frac * (hi - lo), 1)
-            
-            def _co2_by_rule(_uid: str, _ts_utc: datetime) -> float:
-                ts_local = _ts_utc.astimezone(JAKARTA)
-                hour = ts_local.hour
-                siang = 6 <= hour < 18  # 06:00–17:59
-
-                if _uid == "aqmsFOEmmEPISI01":
-                    lo, hi = (50.0, 100.0) if siang else (300.0, 400.0)
-                    return round(random.uniform(lo, hi), 1)
-
-                if _uid == "aqmsFOEmmEPISI02":
-                    lo, hi = (300.0, 400.0) if siang else (500.0, 600.0)
-                    return round(random.uniform(lo, hi), 1)
-
-                # Fallback untuk UID lain: pakai pseudo yang sudah ada (stabil)
-                return _pseudo_co2(_uid, _ts_utc)
-
             # ------ susun rows ------
             rows: List[SensorPoint] = []
             raw_for_db = None
@@ -170,7 +159,7 @@ class MQTTWorker:
                 body = normalize_one(body)
                 sp_kwargs = {k: body.get(k) for k in (
                     "uid","datetime","co","pm25","pm10","tvoc","o3","so2","no","no2",
-                    "temp","rh","wind_speed_kmh","wind_txt","noise","voltage","current","co2"
+                    "temp","rh","windSpeed","windDir","wind_speed_kmh","wind_txt","noise","voltage","current","co2"
                 )}
                 rows.append(SensorPoint(**sp_kwargs))
                 raw_for_db = body
@@ -182,46 +171,46 @@ class MQTTWorker:
                     item = normalize_one(item)
                     sp_kwargs = {k: item.get(k) for k in (
                         "uid","datetime","co","pm25","pm10","tvoc","o3","so2","no","no2",
-                        "temp","rh","wind_speed_kmh","wind_txt","noise","voltage","current","co2"
+                        "temp","rh","windSpeed","windDir","wind_speed_kmh","wind_txt","noise","voltage","current","co2"
                     )}
                     rows.append(SensorPoint(**sp_kwargs))
                     raw_for_db.append(item)
             else:
                 raise ValueError("Unsupported JSON format")
 
-            async with SessionLocal() as session:
-                to_add = []
-                for i, p in enumerate(rows):
-                    raw_item = raw_for_db[i] if isinstance(raw_for_db, list) else raw_for_db
-
-                    # Pastikan UID ada
-                    if not p.uid:
-                        if settings.APP_DEBUG:
-                            print("[MQTT] skip: missing uid")
-                        continue
-
-                    # Normalisasi -> dict row siap insert (ts UTC-naive)
-                    row = p.to_row()
-
-                    # Pastikan ts ada; kalau tidak, pakai now UTC
-                    if row.get("ts") is not None:
-                        ts_utc = row["ts"].replace(tzinfo=timezone.utc)
-                    else:
-                        ts_utc = datetime.utcnow().replace(tzinfo=timezone.utc)
-                        row["ts"] = ts_utc.replace(tzinfo=None)
-
-                    # **ISI CO2 jika kosong** (selalu, tanpa setting)
-                    if row.get("co2") is None:
-                        row["co2"] = _co2_by_rule(p.uid, ts_utc)
-                        # Jika kamu ingin acak benar2, ganti baris di atas dengan:
-                        # row["co2"] = round(random.uniform(400.0, 800.0), 1)
-
-                    rec = SensorData(**row, raw=json.loads(json.dumps(raw_item)))
-                    to_add.append(rec)
-
-                if to_add:
+            prepared = []
+            for i, p in enumerate(rows):
+                raw_item = raw_for_db[i] if isinstance(raw_for_db, list) else raw_for_db
+
+                # Pastikan UID ada
+                if not p.uid:
+                    if settings.APP_DEBUG:
+                        print("[MQTT] skip: missing uid")
+                    continue
+
+                # Normalisasi -> dict row siap insert (ts UTC-naive)
+                row = p.to_row()
+
+                # Pastikan ts ada; kalau tidak, pakai now UTC
+                if row.get("ts") is not None:
+                    row["ts"] = row["ts"].replace(tzinfo=None)
+                else:
+                    row["ts"] = datetime.utcnow()
+                prepared.append((row, raw_item))
+
+            # Field turunan (co2, wind, kalibrasi) per uid — satu batch sekaligus
+            enrich(row for row, _ in prepared)
+
+            to_add = [SensorData(**row, raw=json.loads(json.dumps(raw_item))) for row, raw_item in prepared]
+            if to_add:
+                async with SessionLocal() as session:
                     session.add_all(to_add)
+                    await mark_coverage(session, (row for row, _ in prepared))
                     await session.commit()
+                sensor_reads.invalidate()
+                if settings.HOTSTORE_ENABLED:
+                    hot_store.append(to_add)
+                lag_tracker.record((row for row, _ in prepared), received_at, time.time())
 
             if settings.APP_DEBUG:
                 print(f"[MQTT] {topic} → stored {len(to_add)} row(s)")
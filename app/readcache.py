@@ -0,0 +1,13 @@
+"""Single-flight + micro-cache bersama untuk endpoint baca ``sensor_data``.
+
+Satu instance per proses, dipakai router sensors dan di-invalidate oleh setiap
+jalur tulis di proses yang sama (POST /data/ingest, MQTTWorker). Tulisan dari
+proses lain (``python -m app.backfill``, worker uvicorn lain) tidak bisa
+meng-invalidate; hasilnya terlihat paling lambat setelah
+``SINGLEFLIGHT_CACHE_TTL`` detik.
+"""
+from .config import settings
+from .db import SessionLocal
+from .utils.singleflight import SingleFlight
+
+sensor_reads = SingleFlight(ttl=settings.SINGLEFLIGHT_CACHE_TTL, session_factory=SessionLocal)
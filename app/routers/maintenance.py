@@ -2,13 +2,17 @@ from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import select, func, desc
 from sqlalchemy.ext.asyncio import AsyncSession
-from ..db import get_db
+from ..config import settings
+from ..db import get_db, SessionLocal
 from ..models import MaintenanceHistory
 from ..schemas import MaintenanceCreate, MaintenanceOut, PageOut
 from ..utils.pagination import paginate_meta
+from ..utils.singleflight import SingleFlight
 
 router = APIRouter(prefix="/maintenance", tags=["maintenance"])
 
+_flight = SingleFlight(ttl=settings.SINGLEFLIGHT_CACHE_TTL, session_factory=SessionLocal)
+
 @router.post("", response_model=MaintenanceOut)
 async def create_maintenance(payload: MaintenanceCreate, db: AsyncSession = Depends(get_db)):
     try:
@@ -37,6 +41,7 @@ async def create_maintenance(payload: MaintenanceCreate, db: AsyncSession = Depe
         )
         db.add(rec)
         await db.commit()
+        _flight.invalidate()
         await db.refresh(rec)
         return MaintenanceOut(
             id=rec.id,
@@ -52,15 +57,7 @@ async def create_maintenance(payload: MaintenanceCreate, db: AsyncSession = Depe
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("", response_model=PageOut)
-async def list_maintenance(
-    db: AsyncSession = Depends(get_db),
-    uid: str | None = Query(None),
-    page: int = Query(1, ge=1),
-    per_page: int = Query(10, ge=1, le=200),
-    date_from: datetime | None = Query(None),
-    date_to: datetime | None = Query(None),
-):
+async def _list_maintenance(db: AsyncSession, uid, page, per_page, date_from, date_to):
     try:
         # Base query
         stmt = select(MaintenanceHistory)
@@ -108,3 +105,13 @@ async def list_maintenance(
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("", response_model=PageOut)
+async def list_maintenance(
+    uid: str | None = Query(None),
+    page: int = Query(1, ge=1),
+    per_page: int = Query(10, ge=1, le=200),
+    date_from: datetime | None = Query(None),
+    date_to: datetime | None = Query(None),
+):
+    return await _flight.shared(_list_maintenance, uid, page, per_page, date_from, date_to)
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Query
+from ..hotstore import hot_store
+from ..lag import lag_tracker
+
+router = APIRouter(prefix="/monitor", tags=["monitor"])
+
+@router.get("/lag")
+async def ingest_lag(
+    uid: str | None = None,
+    threshold: float | None = Query(None, ge=0, description="detik; default LAG_ALERT_SECONDS"),
+):
+    """Lag ingest per station (device ts → diterima broker → commit DB) + last seen."""
+    return lag_tracker.snapshot(uid=uid, threshold=threshold)
+
+@router.get("/hotstore")
+async def hotstore_stats():
+    """Isi & pemakaian memori hot store per station."""
+    return hot_store.stats()
@@ -1,20 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import text, select, func, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 from ..db import get_db
-from ..schemas import IngestBody, SensorPoint, SensorFlat, SensorOut, PageOutSensors
+from ..schemas import (
+    IngestBody, SensorPoint, SensorFlat, SensorOut, PageOutSensors,
+    CoverageOut, StationCoverage, CoverageBucket, CoverageGap,
+    SeriesOut, SeriesPoint,
+)
 from ..utils.pagination import paginate_meta
 from ..models import SensorData
-from datetime import datetime, timezone
+from ..enrichment import enrich
+from .. import coverage as coverage_bitmap
+from ..hotstore import hot_store
+from ..config import settings
+from ..readcache import sensor_reads
+from ..utils.downsample import LTTBStream, MinMaxStream
+from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
-import random
 
 JAKARTA = ZoneInfo("Asia/Jakarta")
 
 router = APIRouter(prefix="/data", tags=["sensors"])
 
-@router.get("/latest/flat", response_model=SensorFlat | dict)
-async def latest_flat(uid: str | None = None, db: AsyncSession = Depends(get_db)):
+async def _latest_row_db(db: AsyncSession, uid: str | None):
     q = text("""
         SELECT uid, ts, co, pm25, pm10, tvoc, so2, o3, no, no2, rh, temp, wind_speed_kmh, wind_txt, noise, voltage, current, co2
         FROM sensor_data
@@ -22,7 +30,12 @@ async def latest_flat(uid: str | None = None, db: AsyncSession = Depends(get_db)
         ORDER BY ts DESC
         LIMIT 1
     """)
-    row = (await db.execute(q, {"uid": uid})).mappings().first()
+    return (await db.execute(q, {"uid": uid})).mappings().first()
+
+async def _latest_flat(db: AsyncSession, uid: str | None):
+    # Hot store: row terbaru uid sudah ada di memori
+    hot = hot_store.latest(uid) if uid else None
+    row = vars(hot) if hot is not None else await _latest_row_db(db, uid)
     if not row:
         return {}
     r = dict(row)
@@ -53,16 +66,11 @@ async def latest_flat(uid: str | None = None, db: AsyncSession = Depends(get_db)
         co2=r["co2"],
     )
 
-@router.get("", response_model=PageOutSensors)
-async def list_data(
-    db: AsyncSession = Depends(get_db),
-    uid: str | None = None,
-    page: int = 1,
-    per_page: int = 50,
-    date_from: datetime | None = None,
-    date_to: datetime | None = None,
-    order: str = "desc",
-):
+@router.get("/latest/flat", response_model=SensorFlat | dict)
+async def latest_flat(uid: str | None = None):
+    return await sensor_reads.shared(_latest_flat, uid)
+
+async def _list_rows_db(db, uid, page, per_page, date_from, date_to, order):
     stmt = select(SensorData)
     cnt = select(func.count(SensorData.id))
 
@@ -79,7 +87,6 @@ async def list_data(
 
     total = (await db.execute(cnt)).scalar_one()
 
-    per_page = max(1, min(per_page, 500))
     meta = paginate_meta(page, per_page, total)
     offset = (meta["page"] - 1) * per_page
 
@@ -90,6 +97,17 @@ async def list_data(
             stmt.order_by(order_by).offset(offset).limit(per_page)
         )
     ).scalars().all()
+    return meta, rows
+
+async def _list_data(db: AsyncSession, uid, page, per_page, date_from, date_to, order):
+    if hot_store.covers(uid, date_from):
+        # Rentang ada di hot store → tanpa COUNT + OFFSET ke MySQL
+        total, rows = hot_store.query(uid, date_from, date_to, order, (max(page, 1) - 1) * per_page, per_page)
+        meta = paginate_meta(page, per_page, total)
+        if meta["page"] != page:
+            _, rows = hot_store.query(uid, date_from, date_to, order, (meta["page"] - 1) * per_page, per_page)
+    else:
+        meta, rows = await _list_rows_db(db, uid, page, per_page, date_from, date_to, order)
 
     items = []
     for r in rows:
@@ -124,24 +142,243 @@ async def list_data(
 
     return {"meta": meta, "items": items}
 
+@router.get("", response_model=PageOutSensors)
+async def list_data(
+    uid: str | None = None,
+    page: int = 1,
+    per_page: int = 50,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    order: str = "desc",
+):
+    per_page = max(1, min(per_page, 500))
+    return await sensor_reads.shared(_list_data, uid, page, per_page, date_from, date_to, order.lower())
+
+
+BUCKET_SECONDS = {"hour": 3600, "day": 86400}
+MAX_COVERAGE_BUCKETS = 5000
+
+def _utc_naive(dt: datetime) -> datetime:
+    # kolom ts disimpan sebagai UTC tanpa tzinfo
+    return dt.astimezone(timezone.utc).replace(tzinfo=None) if dt.tzinfo else dt
+
+def _local(dt: datetime) -> str:
+    return dt.replace(tzinfo=timezone.utc).astimezone(JAKARTA).isoformat()
+
+async def _coverage(db: AsyncSession, date_from, date_to, uid, bucket, gap_seconds):
+    if bucket not in BUCKET_SECONDS:
+        raise HTTPException(status_code=400, detail="bucket must be 'hour' or 'day'")
+    if gap_seconds <= 0:
+        raise HTTPException(status_code=400, detail="gap_seconds must be > 0")
+
+    # sampel di masa depan belum mungkin ada → jangan dihitung "expected"
+    start = _utc_naive(date_from)
+    end = min(_utc_naive(date_to), datetime.now(timezone.utc).replace(tzinfo=None))
+    span = (end - start).total_seconds()
+    if span <= 0:
+        raise HTTPException(status_code=400, detail="date_from must be before date_to and now")
+    size = BUCKET_SECONDS[bucket]
+    n_buckets = int(-(-span // size))
+    if n_buckets > MAX_COVERAGE_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"range too large: {n_buckets} buckets (max {MAX_COVERAGE_BUCKETS})")
+
+    # posisi slot dihitung relatif ke tengah malam UTC hari pertama
+    slot = coverage_bitmap.SLOT_SECONDS
+    day0 = start.date()
+    n_days = (end.date() - day0).days + 1
+    origin = datetime(day0.year, day0.month, day0.day)
+    lo = int((start - origin).total_seconds() // slot)
+    hi = int(-(-(end - origin).total_seconds() // slot))
+
+    def at(k: int) -> datetime:
+        return min(max(origin + timedelta(seconds=k * slot), start), end)
+
+    bitmaps = await coverage_bitmap.load(db, day0, end.date(), uid)
+    # Station yang mati sepanjang rentang tetap harus muncul (0%, satu gap penuh)
+    if uid:
+        uids = [uid]
+    else:
+        uids = list((await db.execute(text("SELECT DISTINCT uid FROM sensor_coverage"))).scalars())
+    min_slots = int(gap_seconds // slot) + 1
+
+    stations = []
+    for key in sorted(set(uids) | set(bitmaps)):
+        tl = coverage_bitmap.timeline(bitmaps.get(key, {}), day0, n_days)
+        buckets = []
+        for b in range(n_buckets):
+            b_lo = lo + b * size // slot
+            b_hi = min(lo + (b + 1) * size // slot, hi)
+            exp = max(1, b_hi - b_lo)
+            got = coverage_bitmap.count_slots(tl, b_lo, b_hi)
+            b_start = start + timedelta(seconds=b * size)
+            buckets.append(CoverageBucket(start=_local(b_start), expected=exp, received=got, ratio=round(got / exp, 4)))
+        gaps = []
+        for a, z in coverage_bitmap.gap_runs(tl, lo, hi, min_slots):
+            g_start, g_end = at(a), at(z)
+            seconds = (g_end - g_start).total_seconds()
+            if seconds > gap_seconds:
+                gaps.append(CoverageGap(start=_local(g_start), end=_local(g_end), seconds=seconds))
+        exp_total = sum(x.expected for x in buckets)
+        got_total = sum(x.received for x in buckets)
+        stations.append(StationCoverage(
+            uid=key,
+            expected=exp_total,
+            received=got_total,
+            ratio=round(got_total / exp_total, 4),
+            buckets=buckets,
+            gaps=gaps,
+        ))
+
+    return CoverageOut(
+        date_from=_local(start),
+        date_to=_local(end),
+        bucket=bucket,
+        interval_seconds=slot,
+        gap_seconds=gap_seconds,
+        stations=stations,
+    )
+
+@router.get("/coverage", response_model=CoverageOut)
+async def coverage(
+    date_from: datetime,
+    date_to: datetime,
+    uid: str | None = None,
+    bucket: str = "hour",
+    gap_seconds: float = 300,
+):
+    """Expected vs received per bucket (hour/day, dihitung dari date_from) + daftar gap > gap_seconds.
+
+    Dibaca dari bitmap ``sensor_coverage`` (1 bit per ``COVERAGE_SLOT_SECONDS``,
+    diisi saat ingest): ``expected`` = jumlah slot di bucket, ``received`` =
+    slot yang berisi minimal satu sampel. Tidak ada scan ``sensor_data``.
+    """
+    return await sensor_reads.shared(_coverage, date_from, date_to, uid, bucket, gap_seconds)
+
+SERIES_METHODS = ("lttb", "minmax")
+SERIES_COLUMNS = (
+    "co", "pm25", "pm10", "tvoc", "o3", "so2", "no", "no2",
+    "temp", "rh", "wind_speed_kmh", "noise", "voltage", "current", "co2",
+)
+
+async def _series(db: AsyncSession, uid, pollutants, date_from, date_to, points, method):
+    if method not in SERIES_METHODS:
+        raise HTTPException(status_code=400, detail="method must be 'lttb' or 'minmax'")
+    cols = [c.strip() for c in pollutants.split(",") if c.strip()]
+    unknown = [c for c in cols if c not in SERIES_COLUMNS]
+    if not cols or unknown:
+        raise HTTPException(status_code=400, detail=f"unknown pollutant(s): {unknown or pollutants!r}")
+
+    start, end = _utc_naive(date_from), _utc_naive(date_to)
+    span = (end - start).total_seconds()
+    if span <= 0:
+        raise HTTPException(status_code=400, detail="date_to must be after date_from")
+
+    # LTTB: titik pertama & terakhir tetap, sisanya 1 per bucket; minmax: 2 per bucket
+    n_buckets = max(1, points - 2 if method == "lttb" else points // 2)
+    width = span / n_buckets
+    params = {"uid": uid, "start": start, "end": end, "width": width, "last_b": n_buckets - 1}
+    offset_sql = "TIMESTAMPDIFF(MICROSECOND, :start, ts) / 1000000"
+    # bucket dihitung di satu tempat (SQL) untuk kedua pass, supaya tidak beda di tepi bucket
+    bucket_sql = f"LEAST(FLOOR({offset_sql} / :width), :last_b)"
+    col_sql = ", ".join(f"`{c}`" for c in cols)  # aman: sudah divalidasi terhadap SERIES_COLUMNS
+
+    # Pass 1: rata-rata per bucket (titik C untuk LTTB) + jumlah row
+    avg_q = text(f"""
+        SELECT {bucket_sql} AS b, COUNT(*) AS n, AVG({offset_sql}) AS x,
+               {", ".join(f"AVG(`{c}`) AS `{c}`" for c in cols)}
+        FROM sensor_data
+        WHERE uid = :uid AND ts >= :start AND ts < :end
+        GROUP BY b
+        ORDER BY b
+    """)
+    bucket_rows = (await db.execute(avg_q, params)).mappings().all()
+    total = sum(r["n"] for r in bucket_rows)
+
+    # Pass 2: stream row terurut waktu lewat downsampler (memori tidak tergantung panjang rentang)
+    if total <= points:
+        samplers = None
+        raw: dict[str, list] = {c: [] for c in cols}
+    elif method == "lttb":
+        samplers = {
+            c: LTTBStream([(int(r["b"]), float(r["x"]), float(r[c])) for r in bucket_rows if r[c] is not None])
+            for c in cols
+        }
+    else:
+        samplers = {c: MinMaxStream() for c in cols}
+
+    rows_q = text(f"""
+        SELECT {offset_sql} AS x, {bucket_sql} AS b, {col_sql}
+        FROM sensor_data
+        WHERE uid = :uid AND ts >= :start AND ts < :end
+        ORDER BY ts
+    """)
+    scanned = 0
+    result = await db.stream(rows_q, params)
+    async for r in result.mappings():
+        scanned += 1
+        x = float(r["x"])
+        b = int(r["b"])
+        for c in cols:
+            y = r[c]
+            if y is None:
+                continue
+            if samplers is None:
+                raw[c].append((x, y))
+            else:
+                samplers[c].add(x, y, b)
+
+    base = start.replace(tzinfo=timezone.utc)
+    series = {
+        c: [
+            SeriesPoint(ts=(base + timedelta(seconds=x)).astimezone(JAKARTA).isoformat(), value=y)
+            for x, y in (raw[c] if samplers is None else samplers[c].result())
+        ]
+        for c in cols
+    }
+    return SeriesOut(
+        uid=uid,
+        date_from=_local(start),
+        date_to=_local(end),
+        method=method,
+        points=points,
+        rows_scanned=scanned,
+        series=series,
+    )
+
+@router.get("/series", response_model=SeriesOut)
+async def series(
+    uid: str,
+    date_from: datetime,
+    date_to: datetime,
+    pollutants: str = "pm25",
+    points: int = Query(1000, ge=3, le=10000),
+    method: str = "lttb",
+):
+    """Data chart yang sudah di-downsample (LTTB atau min/max) ke ± `points` titik per pollutant.
+
+    `pollutants` dipisah koma, mis. `pm25,pm10,co`.
+    """
+    return await sensor_reads.shared(_series, uid, pollutants, date_from, date_to, points, method.lower())
+
 
 @router.post("/ingest")
 async def ingest(body: IngestBody, db: AsyncSession = Depends(get_db)):
     try:
         points = [body.data] if isinstance(body.data, SensorPoint) else body.data
 
-        to_add = []
-        for p in points:
-            data = p.to_row()
-
-            # --- jika tidak ada co2 dikirim, isi random antara 400–800 ppm ---
-            if "co2" not in data or data["co2"] is None:
-                data["co2"] = round(random.uniform(400.0, 800.0), 1)
+        rows = [p.to_row() for p in points]
+        co2_missing = sum(1 for d in rows if d.get("co2") is None)
 
-            to_add.append(SensorData(**data))
+        # Field turunan (co2, wind, kalibrasi) — sama dengan jalur MQTT
+        enrich(rows)
 
+        to_add = [SensorData(**data) for data in rows]
         db.add_all(to_add)
+        await coverage_bitmap.mark_coverage(db, rows)
         await db.commit()
-        return {"stored": len(to_add), "co2_randomized": sum(1 for d in to_add if d.co2)}
+        sensor_reads.invalidate()
+        if settings.HOTSTORE_ENABLED:
+            hot_store.append(to_add)
+        return {"stored": len(to_add), "co2_randomized": co2_missing}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
@@ -152,3 +152,45 @@ class PageOutSensors(BaseModel):
     meta: PageMeta
     items: list[SensorOut]
 
+# ==== Sensor (coverage) ====
+class CoverageBucket(BaseModel):
+    start: datetime
+    expected: int
+    received: int
+    ratio: float
+
+class CoverageGap(BaseModel):
+    start: datetime
+    end: datetime
+    seconds: float
+
+class StationCoverage(BaseModel):
+    uid: str
+    expected: int
+    received: int
+    ratio: float
+    buckets: list[CoverageBucket]
+    gaps: list[CoverageGap]
+
+class CoverageOut(BaseModel):
+    date_from: datetime
+    date_to: datetime
+    bucket: str
+    interval_seconds: float
+    gap_seconds: float
+    stations: list[StationCoverage]
+
+# ==== Sensor (series / chart) ====
+class SeriesPoint(BaseModel):
+    ts: datetime
+    value: float
+
+class SeriesOut(BaseModel):
+    uid: str
+    date_from: datetime
+    date_to: datetime
+    method: str
+    points: int
+    rows_scanned: int
+    series: dict[str, list[SeriesPoint]]
+
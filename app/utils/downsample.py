@@ -0,0 +1,98 @@
+from bisect import bisect_right
+from typing import Optional
+
+Point = tuple[float, float]
+
+
+class LTTBStream:
+    """Largest-Triangle-Three-Buckets satu pass untuk data terurut waktu.
+
+    Bucket berbasis waktu (index dihitung pemanggil). Titik C (rata-rata bucket
+    berikutnya) diambil dari ``bucket_avgs`` yang dihitung di SQL sebelumnya,
+    jadi per bucket cukup menyimpan satu kandidat terbaik — memori konstan
+    terhadap jumlah row, hanya sebanding dengan jumlah titik output.
+    """
+
+    def __init__(self, bucket_avgs: list[tuple[int, float, float]]):
+        # (bucket, x rata-rata, y rata-rata), urut naik menurut bucket
+        self._avg_keys = [b for b, _, _ in bucket_avgs]
+        self._avgs = [(x, y) for _, x, y in bucket_avgs]
+        self.out: list[Point] = []
+        self._a: Optional[Point] = None  # titik terpilih sebelumnya
+        self._c: Optional[Point] = None
+        self._cur: Optional[int] = None
+        self._best: Optional[Point] = None
+        self._best_area = -1.0
+        self._last: Optional[Point] = None
+
+    def _next_avg(self, bucket: int) -> Optional[Point]:
+        i = bisect_right(self._avg_keys, bucket)
+        if i < len(self._avgs):
+            return self._avgs[i]
+        # bucket terakhir: pakai rata-rata bucket itu sendiri
+        i -= 1
+        return self._avgs[i] if i >= 0 and self._avg_keys[i] == bucket else None
+
+    def _flush(self):
+        if self._best is not None:
+            self.out.append(self._best)
+            self._a = self._best
+        self._best = None
+        self._best_area = -1.0
+
+    def add(self, x: float, y: float, bucket: int):
+        if self._a is None:
+            # titik pertama selalu ikut
+            self._a = (x, y)
+            self.out.append(self._a)
+            return
+        self._last = (x, y)
+        if bucket != self._cur:
+            self._flush()
+            self._cur = bucket
+            self._c = self._next_avg(bucket) or (x, y)
+        ax, ay = self._a
+        cx, cy = self._c
+        area = abs((ax - cx) * (y - ay) - (ax - x) * (cy - ay))
+        if area > self._best_area:
+            self._best_area = area
+            self._best = (x, y)
+
+    def result(self) -> list[Point]:
+        self._flush()
+        # titik terakhir selalu ikut
+        if self._last is not None and self.out[-1] != self._last:
+            self.out.append(self._last)
+        return self.out
+
+
+class MinMaxStream:
+    """Downsampler min/max per bucket: tiap bucket menyumbang ≤ 2 titik."""
+
+    def __init__(self):
+        self.out: list[Point] = []
+        self._cur: Optional[int] = None
+        self._min: Optional[Point] = None
+        self._max: Optional[Point] = None
+
+    def _flush(self):
+        if self._min is None:
+            return
+        if self._min == self._max:
+            self.out.append(self._min)
+        else:
+            self.out.extend(sorted((self._min, self._max)))
+        self._min = self._max = None
+
+    def add(self, x: float, y: float, bucket: int):
+        if bucket != self._cur:
+            self._flush()
+            self._cur = bucket
+        if self._min is None or y < self._min[1]:
+            self._min = (x, y)
+        if self._max is None or y > self._max[1]:
+            self._max = (x, y)
+
+    def result(self) -> list[Point]:
+        self._flush()
+        return self.out
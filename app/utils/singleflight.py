@@ -0,0 +1,79 @@
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Hashable
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+MAX_CACHE_ENTRIES = 1024
+
+
+class SingleFlight:
+    """Gabungkan query identik yang berjalan bersamaan menjadi satu eksekusi.
+
+    Pemanggil dengan key yang sama selama query masih berjalan menunggu hasil
+    yang sama (termasuk exception). Jika ``ttl`` > 0, hasil juga disimpan
+    sebentar (micro-cache) untuk refresh yang datang tepat sesudahnya.
+    ``fn`` sebaiknya membuka session DB sendiri: eksekusi dibungkus shield,
+    jadi request pertama yang dibatalkan tidak ikut membatalkan yang lain.
+    Setiap jalur tulis di proses yang sama memanggil ``invalidate()`` supaya
+    micro-cache tidak basi (lihat ``app.readcache``).
+    """
+
+    def __init__(self, ttl: float = 0.0, session_factory: Callable[[], Any] | None = None):
+        self.ttl = ttl
+        self.session_factory = session_factory
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self._cache: dict[Hashable, tuple[float, Any]] = {}
+        self._generation = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if self.ttl > 0:
+            hit = self._cache.get(key)
+            if hit and hit[0] > time.monotonic():
+                return hit[1]
+
+        fut = self._inflight.get(key)
+        if fut is None:
+            fut = asyncio.ensure_future(self._run(key, fn))
+            # hindari warning "exception never retrieved" jika semua waiter batal
+            fut.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._inflight[key] = fut
+        return await asyncio.shield(fut)
+
+    async def do_json(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Response:
+        """Seperti do(), tapi hasil di-serialize ke JSON sekali dan dipakai bersama."""
+        async def render() -> bytes:
+            return json.dumps(jsonable_encoder(await fn())).encode()
+        return Response(content=await self.do(key, render), media_type="application/json")
+
+    async def shared(self, fn: Callable[..., Awaitable[Any]], *args) -> Response:
+        """Jalankan ``fn(session, *args)`` sekali untuk semua pemanggil dengan args sama."""
+        async def run():
+            async with self.session_factory() as session:
+                return await fn(session, *args)
+        return await self.do_json((fn.__name__, *args), run)
+
+    def invalidate(self):
+        """Buang micro-cache; hasil query yang sedang berjalan juga tidak akan disimpan."""
+        self._generation += 1
+        self._cache.clear()
+
+    async def _run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        generation = self._generation
+        try:
+            result = await fn()
+            if self.ttl > 0 and generation == self._generation:
+                self._store(key, result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def _store(self, key: Hashable, result: Any):
+        now = time.monotonic()
+        if len(self._cache) >= MAX_CACHE_ENTRIES:
+            self._cache = {k: v for k, v in self._cache.items() if v[0] > now}
+            if len(self._cache) >= MAX_CACHE_ENTRIES:
+                self._cache.clear()
+        self._cache[key] = (now + self.ttl, result)
@@ -0,0 +1,43 @@
+from datetime import date, datetime, timedelta
+
+from app.coverage import DAY_BYTES, SLOT_SECONDS, SLOTS_PER_DAY, build_masks, count_slots, gap_runs, timeline
+
+DAY0 = date(2025, 1, 1)
+MIDNIGHT = datetime(2025, 1, 1)
+
+
+def _tl(slots: list[int], n_days: int = 2) -> bytes:
+    rows = [{"uid": "A", "ts": MIDNIGHT + timedelta(seconds=k * SLOT_SECONDS)} for k in slots]
+    days = {day: bytes(mask) for (_, day), mask in build_masks(rows).items()}
+    return timeline(days, DAY0, n_days)
+
+
+def test_masks_split_per_day_and_round_like_datetime():
+    rows = [
+        {"uid": "A", "ts": MIDNIGHT + timedelta(seconds=SLOT_SECONDS - 0.4)},  # dibulatkan ke slot 1
+        {"uid": "A", "ts": MIDNIGHT + timedelta(days=1)},
+    ]
+    masks = build_masks(rows)
+    assert set(masks) == {("A", DAY0), ("A", DAY0 + timedelta(days=1))}
+    assert masks[("A", DAY0)][0] == 0b10
+    assert masks[("A", DAY0 + timedelta(days=1))][0] == 0b1
+    assert all(len(m) == DAY_BYTES for m in masks.values())
+
+
+def test_count_slots_unaligned_range():
+    tl = _tl([0, 3, 9, 17, SLOTS_PER_DAY + 2])
+    assert count_slots(tl, 0, 2 * SLOTS_PER_DAY) == 5
+    assert count_slots(tl, 3, 17) == 2
+    assert count_slots(tl, 4, 4) == 0
+    assert count_slots(tl, SLOTS_PER_DAY, SLOTS_PER_DAY + 3) == 1
+
+
+def test_gap_runs_threshold_and_edges():
+    filled = [k for k in range(200) if not (10 <= k < 20 or 50 <= k < 52)]
+    tl = _tl(filled, n_days=1)
+    assert gap_runs(tl, 0, 200, 5) == [(10, 20)]
+    assert gap_runs(tl, 0, 200, 2) == [(10, 20), (50, 52)]
+    assert gap_runs(tl, 15, 51, 1) == [(15, 20), (50, 51)]  # run dipotong di batas rentang
+    # hari tanpa data sama sekali = satu gap penuh, lewat jalur cek byte nol
+    assert gap_runs(_tl([]), 100, SLOTS_PER_DAY + 100, 200) == [(100, SLOTS_PER_DAY + 100)]
+    assert gap_runs(_tl(list(range(SLOTS_PER_DAY))), 0, SLOTS_PER_DAY, 200) == []
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from app.hotstore import FLOAT_COLUMNS, HotStore, StationRing
+
+BASE = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _rec(rec_id: int, seconds: float, uid: str = "A"):
+    return SimpleNamespace(
+        id=rec_id,
+        uid=uid,
+        ts=(BASE + timedelta(seconds=seconds)).replace(tzinfo=None),
+        wind_txt=None,
+        **{c: float(rec_id) if c == "co" else None for c in FLOAT_COLUMNS},
+    )
+
+
+def _store(capacity: int) -> HotStore:
+    store = HotStore(hours=6, capacity=capacity)
+    store.ready = True
+    store.covered_from = BASE.timestamp()
+    return store
+
+
+def _ids(ring: StationRing, start: float, end: float) -> list[int]:
+    t0 = BASE.timestamp()
+    return [ring.ids[i] for i in ring.select(t0 + start, t0 + end)]
+
+
+def test_in_order_wrap_uses_logical_order():
+    store = _store(capacity=4)
+    store.append(_rec(i, i * 5) for i in range(1, 8))  # 7 row, ring 4 → 3 terdorong keluar
+    ring = store._stations["A"]
+
+    assert ring.ordered
+    assert ring.evicted_upto == BASE.timestamp() + 15
+    assert _ids(ring, 0, 100) == [4, 5, 6, 7]
+    assert _ids(ring, 25, 35) == [5, 6]
+    assert store.latest("A").id == 7
+
+
+def test_out_of_order_eviction_keeps_latest_and_range():
+    store = _store(capacity=3)
+    store.append([_rec(1, 100), _rec(2, 10), _rec(3, 20)])
+    ring = store._stations["A"]
+    assert not ring.ordered
+    assert store.latest("A").id == 1
+
+    # slot row terbaru (ts=100) tertimpa → max dihitung ulang, evicted_upto = 100
+    store.append([_rec(4, 30)])
+    assert ring.evicted_upto == BASE.timestamp() + 100
+    assert _ids(ring, 0, 200) == [2, 3, 4]
+    # row terbaru sudah keluar dari ring → store tidak bisa menjamin latest
+    assert store.latest("A") is None
+
+
+def test_covers_boundaries():
+    store = _store(capacity=2)
+    store.append([_rec(1, 10), _rec(2, 20), _rec(3, 30)])  # ts=10 terdorong keluar
+
+    assert not store.covers("A", BASE - timedelta(seconds=1))  # sebelum covered_from
+    assert not store.covers("A", BASE + timedelta(seconds=10))  # == evicted_upto
+    assert store.covers("A", BASE + timedelta(seconds=11))
+    assert store.covers("B", BASE)  # uid tanpa data: window lengkap (kosong)
+    assert not store.covers(None, BASE + timedelta(seconds=11))
+    assert not store.covers("A", None)
+
+
+def test_ts_rounded_like_mysql_datetime():
+    store = _store(capacity=4)
+    store.append([_rec(1, 9.6), _rec(2, 20.4)])
+    ring = store._stations["A"]
+    assert _ids(ring, 10, 11) == [1]
+    assert _ids(ring, 20, 21) == [2]